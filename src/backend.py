@@ -1,8 +1,43 @@
 """Database backend for Myrient Search App."""
+import functools
 import re
 import sqlite3
+import threading
 from pathlib import Path
 
+# Columns returned by advanced_search, in display order with the url last
+RESULT_COLUMNS = ("title", "platform", "region", "language", "version", "size", "url")
+
+# Number of distinct-value queries remembered before the cache is reset
+DISTINCT_CACHE_SIZE = 256
+
+# Byte multipliers for the size units used in the Myrient listings
+SIZE_UNITS = {"KiB": 1024, "MiB": 1024 * 1024, "GiB": 1024 * 1024 * 1024}
+_SIZE_RE = re.compile(r"\s*(\d+(?:\.\d+)?)\s*([A-Za-z]*)")
+
+# Size ranges offered as filters: label and upper bound in bytes
+SIZE_RANGES = (
+    ("0-100MiB", 100 * 1024 * 1024),
+    ("100-500MiB", 500 * 1024 * 1024),
+    ("500MiB-1GiB", 1024 * 1024 * 1024),
+    ("1-5GiB", 5 * 1024 * 1024 * 1024),
+    ("5GiB+", float("inf")),
+)
+
+
+@functools.lru_cache(maxsize=8192)
+def _parse_size(size: str | None) -> float | None:
+    """Convert a listing size such as "1.5 GiB" to bytes, None if unparsable."""
+    m = _SIZE_RE.match(size) if size else None
+    if m is None:
+        return None
+    return float(m.group(1)) * SIZE_UNITS.get(m.group(2), 1)
+
+
+def size_to_bytes(size: str | None) -> float:
+    """Convert a listing size such as "1.5 GiB" to bytes, 0 if unparsable."""
+    return _parse_size(size) or 0
+
 
 class MyrientBackend:
     """Database backend for Myrient Search App."""
@@ -22,13 +57,30 @@ class MyrientBackend:
             "size":
                 "SELECT DISTINCT size FROM files WHERE size IS NOT NULL",
             }
+        # Distinct values by (query, params). Each field ignores its own
+        # filter, so e.g. changing the platform reuses the platform list.
+        self._distinct_cache: dict[tuple, list[str]] = {}
+        # Bumped by clear_cache, so queries started before it are not cached
+        self._cache_generation = 0
+        # One connection per thread, kept open so searches skip the connect,
+        # schema parse and pragmas, and reuse SQLite's statement cache
+        self._local = threading.local()
 
 
-    # Helper function to open DB connection
+    # Helper function to get the DB connection
     def get_conn(self) -> sqlite3.Connection:
-        """Open a SQLite connection with REGEXP support."""
+        """Return this thread's SQLite connection with REGEXP support."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
         conn = sqlite3.connect(str(self.db_file))
         conn.row_factory = sqlite3.Row
+        # Searches are read-only: keep sort temporaries in memory and give
+        # the page cache and memory map room for the whole index
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
 
         def regexp(pattern:str, text:str) -> int:
             try:
@@ -39,10 +91,16 @@ class MyrientBackend:
                 return 0
 
         conn.create_function("REGEXP", 2, regexp)
+        self._local.conn = conn
         return conn
 
 
-    def _fetch_distinct(self, field: str, filters: dict | None = None) -> list[str]:
+    def _fetch_distinct(
+            self,
+            field: str,
+            filters: dict | None = None,
+            conn: sqlite3.Connection | None = None,
+            ) -> list[str]:
         if field not in self.QUERY_MAP:
             error = f"Invalid field: {field}"
             raise ValueError(error)
@@ -53,63 +111,70 @@ class MyrientBackend:
         if filters:
             base_query, params = self._apply_text_filters(
                 base_query, params, filters)
-            if "platform" in filters and field != "platform" and filters["platform"]:
-                base_query += " AND platform = ?"
-                params.append(filters["platform"])
-            if "region" in filters and field != "region" and filters["region"]:
-                base_query += " AND region = ?"
-                params.append(filters["region"])
-            if "version" in filters and field != "version" and filters["version"]:
-                base_query += " AND version = ?"
-                params.append(filters["version"])
-            if "language" in filters and field != "language" and filters["language"]:
+            # Each field ignores its own filter
+            for name in ("platform", "region", "version"):
+                if name != field and filters.get(name):
+                    base_query += f" AND {name} = ?"
+                    params.append(filters[name])
+            if field != "language" and filters.get("language"):
                 base_query += " AND ',' || language || ',' LIKE ?"
                 params.append(f"%,{filters['language']},%")
 
-        conn = self.get_conn()
+        if field == "language":
+            # Languages are stored comma-joined; split them in SQL so only the
+            # distinct single languages come back.
+            base_query = (
+                f"WITH RECURSIVE entries(language) AS ({base_query}), "  # noqa: S608
+                "split(lang, rest) AS ("
+                "SELECT '', language || ',' FROM entries "
+                "UNION ALL "
+                "SELECT TRIM(SUBSTR(rest, 1, INSTR(rest, ',') - 1)), "
+                "SUBSTR(rest, INSTR(rest, ',') + 1) FROM split WHERE rest <> ''"
+                ") SELECT DISTINCT lang FROM split"
+            )
+
+        key = (base_query, tuple(params))
+        cached = self._distinct_cache.get(key)
+        if cached is not None:
+            return cached
+
+        generation = self._cache_generation
+        if conn is None:
+            conn = self.get_conn()
         cur = conn.cursor()
         cur.execute(base_query, params)
-        values = [row[0] for row in cur.fetchall() if row[0]]
-        conn.close()
-
-        if field == "language":
-            values = sorted(
-                {lang.strip() for entry in values for lang in entry.split(",")},
-                )
-        else:
-            values = sorted(values)
+        values = sorted(row[0] for row in cur.fetchall() if row[0])
 
+        self._store_distinct(key, values, generation)
         return values
 
-    def _fetch_distinct_size_ranges(self, filters: dict | None = None) -> list[str]:
+    def _store_distinct(self, key: tuple, values: list[str], generation: int) -> None:
+        """Cache distinct values unless the cache was cleared since the query."""
+        if generation != self._cache_generation:
+            return
+        if len(self._distinct_cache) >= DISTINCT_CACHE_SIZE:
+            self._distinct_cache.clear()
+        self._distinct_cache[key] = values
+
+    def clear_cache(self) -> None:
+        """Forget cached filter values, e.g. after the database was updated."""
+        self._distinct_cache.clear()
+        self._cache_generation += 1
+
+    def _fetch_distinct_size_ranges(
+            self,
+            filters: dict | None = None,
+            conn: sqlite3.Connection | None = None,
+            ) -> list[str]:
         """Fetch and categorize distinct sizes into ranges."""
-        sizes = self._fetch_distinct("size", filters)
-        ranges = {
-            "0-100MiB": 0, "100-500MiB": 0, "500MiB-1GiB": 0, "1-5GiB": 0, "5GiB+": 0,
-        }
-        for size_str in sizes:
-            try:
-                num_str, unit = size_str.split()
-                num = float(num_str)
-                if "G" in unit:
-                    num *= 1024
-                elif "K" in unit:
-                    num /= 1024
-
-                if num < 100:  # noqa: PLR2004
-                    ranges["0-100MiB"] += 1
-                elif num < 500:  # noqa: PLR2004
-                    ranges["100-500MiB"] += 1
-                elif num < 1024:  # noqa: PLR2004
-                    ranges["500MiB-1GiB"] += 1
-                elif num < 5120:  # noqa: PLR2004
-                    ranges["1-5GiB"] += 1
-                else:
-                    ranges["5GiB+"] += 1
-            except (ValueError, IndexError):
+        found = set()
+        for size_str in self._fetch_distinct("size", filters, conn):
+            size = _parse_size(size_str)
+            if size is None:
                 continue
+            found.add(next(label for label, upper in SIZE_RANGES if size < upper))
 
-        return [r for r, count in ranges.items() if count > 0]
+        return [label for label, _upper in SIZE_RANGES if label in found]
 
     def _parse_size_range(self, size_range: str) -> tuple[int, int]:
         """Parse size range string into min and max bytes."""
@@ -193,7 +258,7 @@ class MyrientBackend:
         base_query, params = self._apply_text_filters(
             base_query, params, search)
 
-        main_query = "SELECT * " + base_query
+        main_query = f"SELECT {', '.join(RESULT_COLUMNS)} " + base_query
         main_params = list(params)
         main_query, main_params = self._apply_main_filters(
             main_query, main_params, search)
@@ -220,13 +285,11 @@ class MyrientBackend:
         results = cur.fetchall()
 
         # Fetch values for filters
-        platforms = self._fetch_distinct("platform", search)
-        regions = self._fetch_distinct("region", search)
-        single_languages = self._fetch_distinct("language", search)
-        versions = self._fetch_distinct("version", search)
-        size_ranges = self._fetch_distinct_size_ranges(search)
-
-        conn.close()
+        platforms = self._fetch_distinct("platform", search, conn)
+        regions = self._fetch_distinct("region", search, conn)
+        single_languages = self._fetch_distinct("language", search, conn)
+        versions = self._fetch_distinct("version", search, conn)
+        size_ranges = self._fetch_distinct_size_ranges(search, conn)
 
         return results, platforms, regions, single_languages, versions, size_ranges
 
@@ -3,7 +3,6 @@ import concurrent.futures
 import configparser
 import contextlib
 import re
-import shutil
 import sqlite3
 import threading
 from collections.abc import Callable
@@ -19,6 +18,20 @@ from config_defaults import ConfigDefaults
 
 last_base_folder = ""
 
+# Rows updated by rescan_database between commits
+RESCAN_COMMIT_ROWS = 1000
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Open a SQLite connection tuned for the crawler's bulk writes.
+
+    The database is switched to WAL by crawl_and_index, so with
+    synchronous=NORMAL commits no longer wait for an fsync of the main file.
+    """
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
 
 @dataclass
 class CrawlContext:
@@ -51,7 +64,7 @@ class CrawlContext:
 
         """
         if not hasattr(self.thread_local, "conn"):
-            self.thread_local.conn = sqlite3.connect(self.db_path)
+            self.thread_local.conn = _connect(self.db_path)
         return self.thread_local.conn
 
 # Set up ignored folders and aliases from config
@@ -109,12 +122,15 @@ def crawl_and_index(
 
     Notes:
         - Creates the `files` table if it does not exist.
+        - Switches the database to WAL so searches can read while it writes.
         - Uses a thread-local SQLite connection per worker thread.
         - Skips folders listed in `ignored_base_folders` and `ignored_folders`.
         - Commits database changes after processing each folder batch.
 
     """
-    conn = sqlite3.connect(db_path)
+    conn = _connect(db_path)
+    # Persistent for the database file; readers no longer block the writers
+    conn.execute("PRAGMA journal_mode=WAL")
     conn.execute(
         """
         CREATE TABLE IF NOT EXISTS files (
@@ -256,24 +272,37 @@ def _process_batch(
 
 # Rescan and rebuild existing database without crawling the website
 def rescan_database(db_path:str, base_url:str, progress_callback:Callable|None) -> None:
-    """Rescan and rebuild existing database without crawling the website."""
+    """Rescan and rebuild existing database without crawling the website.
+
+    Only rows whose parsed metadata differs from what is stored are written.
+    Progress is reported as (processed, total, changed).
+    """
     backup_path = db_path.with_suffix(db_path.suffix + ".bak")
 
+    conn = _connect(db_path)
+
     if not Path.exists(backup_path):
-        shutil.copy2(db_path, backup_path)
-    else:
-        pass
+        # The backup API also copies commits still only in the -wal file,
+        # which a plain file copy of the database would miss
+        backup = sqlite3.connect(backup_path)
+        try:
+            conn.backup(backup)
+        finally:
+            backup.close()
 
-    conn = sqlite3.connect(db_path)
     c = conn.cursor()
 
-    c.execute("SELECT url FROM files")
-    urls = [row[0] for row in c.fetchall()]
+    c.execute(
+        "SELECT url, title, platform, collection, region, language, version "
+        "FROM files",
+    )
+    rows = c.fetchall()
 
-    total = len(urls)
+    total = len(rows)
+    changed = 0
 
     try:
-        for i, url in enumerate(urls, 1):
+        for i, (url, *stored) in enumerate(rows, 1):
             # Extract path relative to base_url
             url_path = url.removeprefix(base_url)
 
@@ -284,31 +313,35 @@ def rescan_database(db_path:str, base_url:str, progress_callback:Callable|None)
             normalized_platform = normalize_platform_name(meta["platform"])
             meta["platform"] = normalized_platform
 
-            # Update DB entry with new metadata
-            c.execute("""
-                UPDATE files SET
-                    title = ?,
-                    platform = ?,
-                    collection = ?,
-                    region = ?,
-                    language = ?,
-                    version = ?
-                WHERE url = ?
-            """, (
+            new_values = [
                 meta["title"], meta["platform"], meta["collection"], meta["region"],
-                meta["language"], meta["version"], meta["url"],
-            ))
-
-            if i % 100 == 0:
+                meta["language"], meta["version"],
+            ]
+
+            # Unchanged rows are skipped instead of rewritten
+            if new_values != stored:
+                changed += 1
+                c.execute("""
+                    UPDATE files SET
+                        title = ?,
+                        platform = ?,
+                        collection = ?,
+                        region = ?,
+                        language = ?,
+                        version = ?
+                    WHERE url = ?
+                """, (*new_values, meta["url"]))
+
+            if i % RESCAN_COMMIT_ROWS == 0:
                 conn.commit()
-                if progress_callback:
-                    progress_callback(i, total)
+            if i % 100 == 0 and progress_callback:
+                progress_callback(i, total, changed)
 
         delete_ignored_platforms(conn, progress_callback)
 
         conn.commit()
         if progress_callback:
-            progress_callback("Rescan and update complete.", "")
+            progress_callback("Rescan and update complete.", total, changed)
 
     except sqlite3.Error:
         conn.rollback()
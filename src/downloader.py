@@ -1,104 +1,473 @@
 """Downloader for the Myrient Search App."""
+import concurrent.futures
 import contextlib
+import ctypes
+import functools
+import json
+import os
 import queue
 import re
+import statistics
 import subprocess
 import sys
 import threading
+import time
+from collections import deque
 from collections.abc import Callable
 from pathlib import Path
+from typing import NamedTuple
 from urllib.parse import unquote, urlparse
 
+import requests
+from requests.adapters import HTTPAdapter
+
+_LENGTH_RE = re.compile(r"Length: (\d+)")
+_PERCENT_RE = re.compile(r"(\d+)%")
+
+# Terminal events sent to the dispatcher once a worker is done with a file
+_FINISHED = object()
+_ABORTED = object()
+
+# Files at least this large are fetched as parallel byte ranges
+SEGMENT_THRESHOLD = 64 * 1024 * 1024
+SEGMENT_CHUNK_SIZE = 1024 * 1024
+# Seconds between saves of the range offsets used to resume a .part file
+SEGMENT_STATE_INTERVAL = 2.0
+
+# Adaptive concurrency: never run more than this many file workers
+MAX_FILE_WORKERS = 16
+ADAPTIVE_WORKER_STEP = 2
+ADAPTIVE_SAMPLE_SIZE = 3
+
+
+@functools.lru_cache(maxsize=1024)
+def filename_from_url(url:str) -> str:
+    """Return the decoded file name at the end of a download URL."""
+    return Path(unquote(urlparse(url).path)).name
+
+
+# Serializes seek+write on platforms without os.pwrite (Windows)
+_seek_write_lock = threading.Lock()
+
+
+def _write_at(fd:int, data:bytes, offset:int) -> None:
+    """Write all of data at offset without relying on a shared file position."""
+    view = memoryview(data)
+    while view:
+        if hasattr(os, "pwrite"):
+            written = os.pwrite(fd, view, offset)
+        else:
+            with _seek_write_lock:
+                os.lseek(fd, offset, os.SEEK_SET)
+                written = os.write(fd, view)
+        view = view[written:]
+        offset += written
+
+
+def _apply_progress(progress:list[int], event:tuple[int, int] | str) -> bool:
+    """Update [total, downloaded] from a progress event, True if downloaded moved."""
+    # (downloaded, total) reported by segmented downloads
+    if isinstance(event, tuple):
+        progress[1], progress[0] = event
+        return True
+
+    # A line of wget output
+    m_total = _LENGTH_RE.search(event)
+    if m_total:
+        progress[0] = int(m_total.group(1))
+
+    m_prog = _PERCENT_RE.search(event)
+    if m_prog and progress[0]:
+        percent = int(m_prog.group(1))
+        progress[1] = int(percent / 100 * progress[0])
+        return True
+    return False
+
+
+def _load_ranges(path:Path, total_bytes:int) -> list[list[int]] | None:
+    """Return the saved [next offset, last byte] ranges, None if unusable."""
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+        if state["total"] != total_bytes:
+            return None
+        return [[int(lo), int(hi)] for lo, hi in state["ranges"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save_ranges(path:Path, total_bytes:int, ranges:list[list[int]]) -> None:
+    """Atomically save the range offsets of a segmented download."""
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(
+        json.dumps({"total": total_bytes, "ranges": ranges}), encoding="utf-8")
+    tmp.replace(path)
+
+
+class _PartFile:
+    """A .part file filled by parallel byte ranges, resumable after a stop."""
+
+    def __init__(self, filepath:Path, total_bytes:int, segments:int) -> None:
+        """Open filepath, resuming its saved ranges if the size still matches."""
+        self.filepath = filepath
+        self.state_path = filepath.with_suffix(".ranges")
+        self.total_bytes = total_bytes
+
+        # [next offset, last byte] per range
+        ranges = (
+            _load_ranges(self.state_path, total_bytes) if filepath.exists() else None)
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_BINARY", 0)
+        if ranges is None:
+            step = -(-total_bytes // segments)
+            ranges = [
+                [lo, min(lo + step, total_bytes) - 1]
+                for lo in range(0, total_bytes, step)
+            ]
+            flags |= os.O_TRUNC
+        self.ranges = ranges
+        # All ranges write through one descriptor at explicit offsets
+        self.fd: int | None = os.open(filepath, flags)
+        os.ftruncate(self.fd, total_bytes)
+
+        self.downloaded = total_bytes - sum(hi - lo + 1 for lo, hi in ranges)
+        self._lock = threading.Lock()
+        self._last_saved = time.monotonic()
+
+
+    def pending(self) -> list[list[int]]:
+        """Return the ranges that still have bytes to fetch."""
+        return [rng for rng in self.ranges if rng[0] <= rng[1]]
+
+
+    def write(self, rng:list[int], chunk:bytes) -> int:
+        """Write chunk at the range's next offset, return the bytes done."""
+        _write_at(self.fd, chunk, rng[0])
+        with self._lock:
+            rng[0] += len(chunk)
+            self.downloaded += len(chunk)
+            now = time.monotonic()
+            if now - self._last_saved >= SEGMENT_STATE_INTERVAL:
+                self._last_saved = now
+                _save_ranges(self.state_path, self.total_bytes, self.ranges)
+            return self.downloaded
+
+
+    def close(self) -> None:
+        """Close the file descriptor."""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+
+    def finish(self, *, complete:bool, keep:bool) -> None:
+        """Close the file, keeping what is needed to resume it if keep is set."""
+        self.close()
+        if complete or not keep or not self.downloaded:
+            # Nothing to resume: drop the offsets, and the file unless complete
+            stale = [self.state_path] if complete else [self.state_path, self.filepath]
+            for path in stale:
+                with contextlib.suppress(OSError):
+                    path.unlink()
+            return
+        # Keep the .part file and record where each range stopped
+        with contextlib.suppress(OSError):
+            _save_ranges(self.state_path, self.total_bytes, self.ranges)
+
+
+class _WgetExit(NamedTuple):
+    """A wget process whose output has ended, left for the dispatcher to reap."""
+
+    process: subprocess.Popen
+    filepath: Path
+    target: Path
+
 
 class Downloader:
     """Downloader class for the Myrient Search App."""
 
-    def __init__(self, output_dir:str, max_file_workers:int=4) -> None:
-        """Initialize variables."""
+    def __init__(self,
+                 output_dir:str,
+                 max_file_workers:int=4,
+                 *,
+                 pin_cpu:bool=False,
+                 segments:int=4,
+                 adaptive:bool=False,
+                 ) -> None:
+        """Initialize variables.
+
+        pin_cpu keeps the process on a single core. The download threads only
+        coordinate wget processes, so on a GIL build they gain nothing from
+        migrating between cores. Off by default.
+
+        segments is the number of parallel range requests used for files
+        larger than SEGMENT_THRESHOLD. Set it to 1 to always use wget.
+
+        adaptive starts with max_file_workers and adds workers, up to
+        MAX_FILE_WORKERS, for as long as the measured throughput keeps growing.
+        """
         dir_path = Path(
             sys.executable if getattr(sys, "frozen", False) else __file__).parent
 
         self.wget_binary = Path(dir_path, "wget.exe")
+        self._wget_argv_prefix = (
+            self.wget_binary,
+            "-m",
+            "-np",
+            "-c",
+            "-e", "robots=off",
+            "-R", "index.html*",
+            "--progress=dot:mega",
+            "-O",
+        )
+        self._creationflags = (
+            subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+        )
         self.output_dir = Path(output_dir)
         Path.mkdir(self.output_dir, parents=True, exist_ok=True)
 
-        self.max_file_workers = max_file_workers
-        self.download_queue = queue.Queue()
+        self.max_file_workers = max(1, min(max_file_workers, MAX_FILE_WORKERS))
+        self.adaptive = adaptive
+        self._throughput_samples: deque[float] = deque(maxlen=ADAPTIVE_SAMPLE_SIZE)
+        self._best_throughput = 0.0
+        self.segments = max(segments, 1)
+
+        # One pooled HTTP session for all probes and range requests, so
+        # connections to the mirror are reused instead of opened per request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=MAX_FILE_WORKERS * self.segments)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.download_queue: deque[tuple[int, str]] = deque()
         self.processes = []
         self.cancel_flag = threading.Event()
         self.download_running = False
         self.file_idx_counter = 0
         self.lock = threading.Lock()
+        self.job_available = threading.Condition(self.lock)
 
+        # Raw wget output from the workers, consumed by the dispatcher thread
+        self.events: queue.SimpleQueue = queue.SimpleQueue()
 
-    def _download_file(self,
-                       file_idx:str,
-                       url:str,
-                       progress_callback:Callable|None,
-                       )-> None:
-        """Start a wget process to download a single file."""
-        parsed = urlparse(url)
-        filename = Path(unquote(parsed.path)).name
+        # Number of queued or running downloads, guarded by self.lock
+        self.unfinished = 0
+        self.idle = threading.Event()
+        self.idle.set()
+
+        # Number of live worker threads, guarded by self.lock. stopped is
+        # set once the last one has exited.
+        self.workers = 0
+        self.stopped = threading.Event()
+        self.stopped.set()
+
+        if pin_cpu:
+            self._pin_to_single_core()
+
+
+    @staticmethod
+    def _pin_to_single_core() -> None:
+        """Restrict the current process to a single CPU core."""
+        # Free-threaded builds can actually run the threads in parallel
+        is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+        if is_gil_enabled is not None and not is_gil_enabled():
+            return
+        with contextlib.suppress(OSError, AttributeError):
+            if hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(0, {max(os.sched_getaffinity(0))})
+            elif sys.platform == "win32":
+                kernel32 = ctypes.windll.kernel32
+                kernel32.SetProcessAffinityMask(kernel32.GetCurrentProcess(), 1)
+
+
+    def _download_file(self, file_idx:int, url:str) -> bool | _WgetExit:
+        """Run wget for a single file, forwarding its output to the dispatcher."""
+        filename = filename_from_url(url)
         filepath = Path(self.output_dir, filename + ".incomplete")
-        wget_args = [
-            "-m",
-            "-np",
-            "-c",
-            "-e", "robots=off",
-            "-R", "index.html*",
-            "--progress=dot:mega",
-            "-O", filepath,
-        ]
 
-        cmd = [self.wget_binary, *wget_args, url]
+        # An existing wget partial is resumed by wget rather than re-fetched.
+        # A failed segmented download falls back to wget.
+        if self.segments > 1 and not filepath.exists():
+            total_bytes = self._probe_ranged_size(url)
+            if total_bytes and self._download_segmented(
+                    file_idx, url, filename, total_bytes):
+                return True
+            if self.cancel_flag.is_set():
+                return False
 
-        creationflags = 0
-        if sys.platform == "win32":
-            creationflags = subprocess.CREATE_NO_WINDOW
+        cmd = (*self._wget_argv_prefix, filepath, url)
 
         process = subprocess.Popen(  # noqa: S603
             cmd,
             stderr=subprocess.PIPE,
             text=True,
             bufsize=1,
-            creationflags=creationflags,
+            creationflags=self._creationflags,
         )
         self.processes.append(process)
 
-        total_bytes = None
-        downloaded_bytes = 0
+        for line in process.stderr:
+            if self.cancel_flag.is_set():
+                process.terminate()
+                break
+            self.events.put((file_idx, url, line))
+
+        if not self.cancel_flag.is_set():
+            # Reaping wget and the rename happen on the dispatcher thread,
+            # so this worker can move on to the next URL straight away.
+            return _WgetExit(process, filepath, Path(self.output_dir, filename))
 
-        process_finished = False
+        # The partial file is kept so the next attempt resumes it with wget -c
+        process.wait()
+        return False
+
+
+    def _finish_wget(self, wget_exit:_WgetExit) -> object:
+        """Reap a wget process whose output has ended and publish its file."""
+        wget_exit.process.wait()
+        # A failed wget leaves the .incomplete file for the next -c to resume
+        if self.cancel_flag.is_set() or wget_exit.process.returncode != 0:
+            return _ABORTED
         try:
-            for line in process.stderr:
-                if self.cancel_flag.is_set():
-                    process.terminate()
-                    break
+            Path.rename(wget_exit.filepath, wget_exit.target)
+        except OSError:
+            return _ABORTED
+        return _FINISHED
+
+
+    def _probe_ranged_size(self, url:str) -> int | None:
+        """Return the file size if the server allows a segmented download."""
+        try:
+            r = self.session.head(url, timeout=10, allow_redirects=True)
+            r.raise_for_status()
+        except requests.RequestException:
+            return None
+
+        if r.headers.get("Accept-Ranges", "").lower() != "bytes":
+            return None
+        try:
+            total_bytes = int(r.headers.get("Content-Length", 0))
+        except ValueError:
+            return None
+        return total_bytes if total_bytes >= SEGMENT_THRESHOLD else None
 
-                m_total = re.search(r"Length: (\d+)", line)
-                if m_total:
-                    total_bytes = int(m_total.group(1))
 
-                m_prog = re.search(r"(\d+)%", line)
-                if m_prog and total_bytes:
-                    percent = int(m_prog.group(1))
-                    downloaded_bytes = int(percent / 100 * total_bytes)
-                    progress_callback(file_idx, url, downloaded_bytes, total_bytes)
+    def _download_segmented(self,
+                            file_idx:int,
+                            url:str,
+                            filename:str,
+                            total_bytes:int,
+                            ) -> bool:
+        """Download a file as parallel byte ranges written in place.
 
-            process.wait()
-            if not self.cancel_flag.is_set():
+        If a range fails, the missing ranges are retried one at a time on a
+        single stream. When that fails too, the .part file is removed so the
+        caller can fall back to wget. On cancel, where each range stopped is
+        saved next to the .part file and the next attempt resumes from there.
+        """
+        part = _PartFile(
+            Path(self.output_dir, filename + ".part"), total_bytes, self.segments)
+        # Set by the first range that fails, so the others stop early
+        failed = threading.Event()
+
+        def fetch_range(rng:list[int]) -> bool:
+            headers = {"Range": f"bytes={rng[0]}-{rng[1]}"}
+            try:
+                with self.session.get(
+                        url, headers=headers, stream=True, timeout=30) as r:
+                    if r.status_code != 206:  # noqa: PLR2004
+                        failed.set()
+                        return False
+                    for chunk in r.iter_content(SEGMENT_CHUNK_SIZE):
+                        if self.cancel_flag.is_set() or failed.is_set():
+                            return False
+                        done = part.write(rng, chunk)
+                        self.events.put((file_idx, url, (done, total_bytes)))
+            except (requests.RequestException, OSError):
+                failed.set()
+                return False
+            if rng[0] <= rng[1]:
+                # The server closed the range early
+                failed.set()
+                return False
+            return True
+
+        process_finished = False
+        try:
+            pending = part.pending()
+            with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max(len(pending), 1)) as executor:
+                results = list(executor.map(fetch_range, pending))
+
+            if not all(results) and not self.cancel_flag.is_set():
+                # e.g. the server limits parallel range requests: fetch the
+                # rest one range at a time on a single stream
+                failed.clear()
+                results = [all(fetch_range(rng) for rng in part.pending())]
+
+            part.close()
+            if all(results) and part.downloaded == total_bytes:
+                Path.rename(part.filepath, Path(self.output_dir, filename))
                 process_finished = True
-                Path.rename(filepath, Path(self.output_dir, filename))
-                progress_callback(
-                    file_idx,
-                    url,
-                    total_bytes or downloaded_bytes,
-                    total_bytes or downloaded_bytes,
-                    )
+
+        except OSError:
+            pass
 
         finally:
-            if not process_finished:
-                self.clean_up_partial_files(filepath)
+            # Only a cancelled download is kept; a failed one goes to wget
+            part.finish(
+                complete=process_finished, keep=self.cancel_flag.is_set())
+
+        return process_finished
+
+
+    def _dispatch(self, progress_callback:Callable|None) -> None:
+        """Parse wget output and invoke progress_callback from one thread.
+
+        progress_callback(file_idx, url, completed, total) reports progress
+        and, with completed == total, a finished file. An aborted file is
+        reported once more with failed=True.
+        """
+        # file_idx -> [total_bytes, downloaded_bytes]
+        state: dict[int, list[int]] = {}
+        # file_idx -> time of the first event, for throughput sampling
+        started: dict[int, float] = {}
+
+        while True:
+            file_idx, url, event = self.events.get()
+
+            if isinstance(event, _WgetExit):
+                event = self._finish_wget(event)
+
+            if event is _FINISHED or event is _ABORTED:
+                total_bytes, downloaded_bytes = state.pop(file_idx, (0, 0))
+                start_time = started.pop(file_idx, None)
+                if event is _FINISHED and progress_callback:
+                    progress_callback(
+                        file_idx,
+                        url,
+                        total_bytes or downloaded_bytes,
+                        total_bytes or downloaded_bytes,
+                        )
+                elif progress_callback:
+                    # Lets the UI free whatever it showed for this file
+                    progress_callback(
+                        file_idx, url, downloaded_bytes, total_bytes, failed=True)
+                if event is _FINISHED and self.adaptive and start_time is not None:
+                    self._record_throughput(
+                        total_bytes or downloaded_bytes,
+                        time.perf_counter() - start_time,
+                        )
+                self._job_done()
+                continue
+
+            if file_idx not in state:
+                started[file_idx] = time.perf_counter()
+            progress = state.setdefault(file_idx, [0, 0])
+
+            # Completion is reported once, by the terminal event, so progress
+            # at 100% is not forwarded here as a second "finished" update.
+            if (_apply_progress(progress, event) and progress_callback
+                    and progress[1] < progress[0]):
+                progress_callback(file_idx, url, progress[1], progress[0])
 
 
     def start(self,
@@ -110,60 +479,125 @@ class Downloader:
 
         self.download_running = True
 
-        def worker() -> None:
-            while not self.cancel_flag.is_set():
-                try:
-                    idx, url = self.download_queue.get(timeout=1)
-                except queue.Empty:
-                    if not self.download_running and self.download_queue.empty():
-                        break
-                    continue
+        threading.Thread(
+            target=self._dispatch, args=(progress_callback,), daemon=True).start()
+
+        self._start_workers(self.max_file_workers)
+
+
+    def _start_workers(self, count:int) -> None:
+        """Start count worker threads pulling from the download queue."""
+        with self.lock:
+            self.workers += count
+            self.stopped.clear()
+        for _ in range(count):
+            threading.Thread(target=self._worker, daemon=True).start()
+
 
+    def _worker(self) -> None:
+        """Download queued URLs until cancelled."""
+        try:
+            self._work()
+        finally:
+            with self.lock:
+                self.workers -= 1
+                if self.workers <= 0:
+                    self.stopped.set()
+                    # Drops the pooled connections; the session opens new
+                    # ones if another batch is started later
+                    self.session.close()
+
+
+    def _work(self) -> None:
+        """Worker loop: take queued URLs and download them."""
+        while True:
+            with self.job_available:
+                while (not self.download_queue
+                       and self.download_running
+                       and not self.cancel_flag.is_set()):
+                    self.job_available.wait()
+                if self.cancel_flag.is_set() or not self.download_queue:
+                    break
+                idx, url = self.download_queue.popleft()
+
+            result = False
+            try:
                 if not self.cancel_flag.is_set():
-                    self._download_file(idx, url, progress_callback)
-                    self.download_queue.task_done()
+                    result = self._download_file(idx, url)
+            finally:
+                if not isinstance(result, _WgetExit):
+                    result = _FINISHED if result else _ABORTED
+                self.events.put((idx, url, result))
+
+
+    def _record_throughput(self, size:int, elapsed:float) -> None:
+        """Add workers while the aggregate download throughput keeps growing."""
+        if elapsed <= 0 or self.max_file_workers >= MAX_FILE_WORKERS:
+            return
+
+        self._throughput_samples.append(size / elapsed)
+        if len(self._throughput_samples) < ADAPTIVE_SAMPLE_SIZE:
+            return
+
+        throughput = statistics.median(self._throughput_samples) * self.max_file_workers
+        self._throughput_samples.clear()
+
+        # Hold once another step no longer adds at least 10 %
+        if throughput < self._best_throughput * 1.1:
+            self.adaptive = False
+            return
+
+        self._best_throughput = throughput
+        added = min(ADAPTIVE_WORKER_STEP, MAX_FILE_WORKERS - self.max_file_workers)
+        self.max_file_workers += added
+        self._start_workers(added)
 
-        threads = []
-        for _ in range(self.max_file_workers):
-            t = threading.Thread(target=worker, daemon=True)
-            threads.append(t)
-            t.start()
+
+    def _job_done(self) -> None:
+        """Mark one queued download as finished."""
+        with self.lock:
+            self.unfinished -= 1
+            if self.unfinished <= 0:
+                self.unfinished = 0
+                self.idle.set()
 
 
     def add_url(self, url:str) -> int:
-        """Add a new URL to the download queue."""
+        """Add a new URL to the download queue, return the downloads pending."""
         with self.lock:
-            self.download_queue.put((self.file_idx_counter, url))
+            self.download_queue.append((self.file_idx_counter, url))
             self.file_idx_counter += 1
-        return self.download_queue.qsize()
+            self.unfinished += 1
+            self.idle.clear()
+            self.job_available.notify()
+            return self.unfinished
+
+
+    def wait_until_idle(self) -> None:
+        """Block until every queued download has finished."""
+        self.idle.wait()
 
 
     def all_stopped(self) -> bool:
         """Check if the download queue is empty."""
-        return self.download_queue.empty()
+        return not self.download_queue
+
+
+    def wait_until_stopped(self, timeout:float|None=None) -> bool:
+        """Block until every worker thread has exited, False on timeout."""
+        return self.stopped.wait(timeout)
 
 
     def cancel_all(self) -> None:
         """Cancel all current downloads."""
         self.cancel_flag.set()
-        while not self.download_queue.empty():
-            try:
-                self.download_queue.get_nowait()
-            except queue.Empty:
-                break
+        with self.lock:
+            self.unfinished -= len(self.download_queue)
+            self.download_queue.clear()
+            if self.unfinished <= 0:
+                self.unfinished = 0
+                self.idle.set()
+            self.job_available.notify_all()
         for p in self.processes:
             with contextlib.suppress(Exception):
                 p.terminate()
-
-
-    def clean_up_partial_files(self, filepath:str) -> None:
-        """Remove unfinished downloads."""
-        path = Path(filepath)
-        try:
-            path.unlink()
-        except FileNotFoundError:
-            pass
-        except PermissionError:
-            pass
-        except OSError:
-            pass
@@ -1,18 +1,59 @@
 """Entry point for the Myrient GUI application."""
 
+import argparse
 import sys
 from pathlib import Path
 from typing import Final
 
 import tui
+from downloader import MAX_FILE_WORKERS
 
 BASE_URL: Final[str] = "https://myrient.erista.me/files/"
 DB_FILE: Final[Path] = Path("myrient_index.db")
 DOWNLOAD_DIR: Final[Path] = Path("downloads")
 
 
+def worker_count(value: str) -> int:
+    """Parse --workers: at least 1, capped at MAX_FILE_WORKERS."""
+    try:
+        count = int(value)
+    except ValueError:
+        error = f"invalid worker count: {value!r}"
+        raise argparse.ArgumentTypeError(error) from None
+    if count < 1:
+        error = "at least one worker is needed"
+        raise argparse.ArgumentTypeError(error)
+    return min(count, MAX_FILE_WORKERS)
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Search and download from Myrient.")
+    parser.add_argument(
+        "--workers",
+        type=worker_count,
+        default=4,
+        help=(
+            "number of files downloaded in parallel "
+            f"(default: 4, max: {MAX_FILE_WORKERS})"
+        ),
+    )
+    parser.add_argument(
+        "--adaptive-workers",
+        action="store_true",
+        help="add download workers while throughput keeps improving",
+    )
+    parser.add_argument(
+        "--pin-cpu",
+        action="store_true",
+        help="keep the process on a single CPU core (no effect without the GIL)",
+    )
+    return parser.parse_args()
+
+
 def main() -> None:
     """Initialize paths and run the GUI application."""
+    args = parse_args()
     base_dir: Path = (
         Path(sys.executable).parent
         if getattr(sys, "frozen", False)
@@ -22,7 +63,14 @@ def main() -> None:
     download_dir: Path = base_dir / DOWNLOAD_DIR
 
     # Run TUI
-    app = tui.MyrientTUI(BASE_URL, db_file, download_dir)
+    app = tui.MyrientTUI(
+        BASE_URL,
+        db_file,
+        download_dir,
+        max_workers=args.workers,
+        adaptive_workers=args.adaptive_workers,
+        pin_cpu=args.pin_cpu,
+        )
     app.run()
 
 
@@ -1,16 +1,25 @@
 """The TUI layout for the Myrient Search App."""
+import asyncio
 import contextlib
+import functools
 import logging
 import queue
+import sqlite3
+import string
 import threading
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import UTC, date, datetime
 from pathlib import Path
-from time import time
-from urllib.parse import unquote, urlparse
+from time import perf_counter
+from typing import TYPE_CHECKING
+from urllib.parse import unquote
 
 from textual.app import App, ComposeResult
 from textual.containers import Horizontal, Vertical
-from textual.errors import TextualError
+from textual.message import Message
 from textual.reactive import reactive
 from textual.widgets import (
     Button,
@@ -27,12 +36,102 @@ from textual.widgets import (
 import crawler
 
 # Local imports
-from backend import MyrientBackend
-from downloader import Downloader
+from backend import MyrientBackend, size_to_bytes
+from downloader import MAX_FILE_WORKERS, Downloader, filename_from_url
+
+if TYPE_CHECKING:
+    from textual.timer import Timer
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for further search requests before querying the database,
+# longer once the previous search returned a large page
+SEARCH_DEBOUNCE = 0.1
+SEARCH_DEBOUNCE_LARGE = 0.4
+LARGE_RESULT_COUNT = 500
+
+# Largest page the results table is asked to render at once
+MAX_PAGE_SIZE = 500
+
+# Number of recent advanced_search results kept for repeated searches
+SEARCH_CACHE_SIZE = 16
+
+# Minimum seconds between crawler status updates shown in the UI
+DB_PROGRESS_INTERVAL = 0.1
+
+# Seconds to wait on quit for cancelled downloads to stop, while the UI
+# shows it, and the short wait left for other exits that block the UI
+EXIT_TIMEOUT = 5.0
+UNMOUNT_TIMEOUT = 0.5
+
+
+@functools.lru_cache(maxsize=4096)
+def _display_url(url: str) -> str:
+    """Return the human readable form of a result URL."""
+    return unquote(url)
+
+
+@functools.lru_cache(maxsize=256)
+def _progress_text(url: str, total: int) -> str:
+    """Return the progress slot label for a download, built once per file."""
+    size = f"{(total or 0) >> 20}MB"
+    return f"{size:6} {filename_from_url(url)}"
+
+
+def _select_value(select: Select) -> str | None:
+    """Return a filter Select's value, None for "all" or no selection."""
+    # Textual returns a NoSelection object when nothing is selected
+    value = select.value
+    if not isinstance(value, str) or value == "all":
+        return None
+    return value
+
+
+# COLLATE NOCASE folds ASCII letters only, so the local sort must too
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _sort_key(column: str, value: str | None) -> tuple:
+    """Sort key matching the ORDER BY used by the backend (NULLs first)."""
+    if column == "size":
+        return (value is not None, size_to_bytes(value))
+    return (value is not None, (value or "").translate(_ASCII_LOWER))
+
+
+def _parse_limit(value: str) -> int:
+    """Parse the page size input, 100 if invalid or below 1."""
+    try:
+        limit = int(value.strip())
+    except ValueError:
+        return 100
+    # SQLite reads LIMIT -1 as no limit, and 0 would never page forward
+    return limit if limit >= 1 else 100
+
+
+@dataclass(slots=True)
+class ProgressSlot:
+    """A progress bar and label pair, and the file it currently shows."""
+
+    pbar: ProgressBar
+    label: Label
+    in_use: bool = False
+    file_idx: str | None = None
+    text: str = ""
+    percent: float = 0.0
+
+
+class ProgressPending(Message):
+    """Posted by worker threads when progress messages are waiting."""
+
+
+class DbProgress(Message):
+    """Posted by the crawler thread with its latest status text."""
+
+    def __init__(self, text: str) -> None:
+        """Store the status text."""
+        super().__init__()
+        self.text = text
 
 
 class MyrientTUI(App):
@@ -77,20 +176,28 @@ class MyrientTUI(App):
     .progress_label { width: 70%; }
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
             self,
             base_url: str,
             db_file: str|Path,
             download_dir: str|Path,
+            *,
+            max_workers: int = 4,
+            adaptive_workers: bool = False,
+            pin_cpu: bool = False,
             ) -> None:
         """Initialize the TUI with the given backend."""
         super().__init__()
 
         self.base_url = base_url
-        self.db_file = db_file
+        # Converted once here; the db code below relies on Path methods
+        self.db_file = Path(db_file)
         self.dbfile_time = None
 
-        self.download_dir = download_dir
+        self.download_dir = Path(download_dir)
+        self.max_workers = max_workers
+        self.adaptive_workers = adaptive_workers
+        self.pin_cpu = pin_cpu
 
         self.backend = None
         self.downloader = None
@@ -100,7 +207,40 @@ class MyrientTUI(App):
 
         self.columns = ("title", "platform", "region", "language", "version", "size")
 
-        self.result_urls: dict[str, str] = {}
+        # URL per DataTable row, indexed by row number
+        self.result_urls: list[str] = []
+        # Last option tuple applied to each filter Select, keyed by widget id
+        self._select_options: dict[str, tuple[str, ...]] = {}
+        self._search_timer: Timer | None = None
+        # Incremented per search so results of superseded searches are dropped
+        self._search_token = 0
+        # One reused thread runs the searches; a queued search is cancelled
+        # when a newer one is submitted
+        self._search_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="myrient-search")
+        self._search_future: Future | None = None
+        # Thread running a database update or repair, if any
+        self._db_thread: threading.Thread | None = None
+        self._db_progress_time = 0.0
+        self._db_progress_pending: str | None = None
+        self._db_progress_lock = threading.Lock()
+        self._db_flush_timer: Timer | None = None
+        # Recent backend results by query, cleared when the database changes
+        self._search_cache: OrderedDict[tuple, tuple] = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+        # Bumped on every clear, so searches started before it are not cached
+        self._search_cache_generation = 0
+        # Parsed page size, kept in sync with #results_per_page_input
+        self._limit = 100
+        self._limit_warned = False
+
+        # Last displayed page, kept for re-sorting without a new query.
+        # _last_signature is None unless the page holds every match.
+        self._last_results: list = []
+        self._last_rows: list[tuple[tuple[str, ...], str]] = []
+        self._last_signature: tuple | None = None
+        # Ascending row order per column; descending is the same list reversed
+        self._sort_orders: dict[str, list[int]] = {}
         self.sort_column: str = "title"
         self.sort_reverse: bool = False
 
@@ -156,39 +296,67 @@ class MyrientTUI(App):
 
     def on_mount(self) -> None:
         """Set up the results table on mount."""
-        self.progress_queue: queue.Queue = queue.Queue()
-        self.progress_slots: list = []
+        # Widgets used on every search and status update, looked up once
+        self.results_table = self.query_one(DataTable)
+        self.status_label = self.query_one("#status_label", Label)
+        self.search_input = self.query_one("#search_input", Input)
+        self.limit_input = self.query_one("#results_per_page_input", Input)
+        self.regex_checkbox = self.query_one("#regex_checkbox", Checkbox)
+        self.selects = {
+            sel_id: self.query_one(sel_id, Select)
+            for sel_id in ("#platform_select", "#region_select", "#language_select",
+                           "#version_select", "#size_select")
+            }
+
+        self.progress_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.progress_slots: list[ProgressSlot] = []
+        # Slots by the file index they show, and slots free for a new file
+        self._slot_by_idx: dict[str, ProgressSlot] = {}
+        self._free_slots: deque[ProgressSlot] = deque()
 
         self.progress_container = Vertical(id="progress_container")
         self.mount(self.progress_container)
+        # Build the slots for the configured workers now, so the first
+        # download does not pay for mounting them
+        # Downloader clamps the worker count the same way
+        self.ensure_progress_slots(max(1, min(self.max_workers, MAX_FILE_WORKERS)))
 
-        self.set_interval(0.5, self.update_progress_from_queue)
+        # Set while a ProgressPending wakeup is posted but not yet handled
+        self._progress_wakeup = threading.Event()
 
-        results_table = self.query_one(DataTable)
+        results_table = self.results_table
         results_table.add_column("Title", key="title", width=50)
         results_table.add_column("Platform", key="platform", width=40)
         results_table.add_column("Region", key="region", width=10)
         results_table.add_column("Language", key="language", width=10)
         results_table.add_column("Version", key="version", width=10)
         results_table.add_column("Size", key="size", width=10)
-        results_table.add_rows([])
         if self.check_if_db_exists():
             self.do_search()
 
+    def on_input_changed(self, event: Input.Changed) -> None:
+        """Handle input change events."""
+        if event.input.id == "results_per_page_input":
+            requested = _parse_limit(event.value)
+            self._limit = max(1, min(requested, MAX_PAGE_SIZE))
+            if requested > MAX_PAGE_SIZE and not self._limit_warned:
+                self._limit_warned = True
+                self.notify(
+                    f"Showing at most {MAX_PAGE_SIZE} results per page, "
+                    "use Load more for the rest.",
+                    severity="warning",
+                    )
+
     def on_input_submitted(self, event: Input.Submitted) -> None:
         """Handle input submission events."""
         if event.input.id == "search_input":
-            results_table = self.query_one(DataTable)
-            results_table.clear()
-            self.do_search()
+            self.schedule_search()
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         """Handle button press events."""
         if event.button.id == "search_button":
-            self.do_search()
+            self.schedule_search()
         elif event.button.id == "load_more_button":
-            results_table = self.query_one(DataTable)
-            results_table.clear()
             self.load_more_results()
         elif event.button.id == "download_button":
             self.start_download()
@@ -197,14 +365,11 @@ class MyrientTUI(App):
         elif event.button.id == "update_button":
             self.update_db(progress_callback=self.db_progress_handler)
         elif event.button.id == "reset_button":
-            self.query_one("#search_input", Input).value = ""
-            self.query_one("#results_per_page_input", Input).value = "100"
-            self.query_one("#platform_select", Select).value = "all"
-            self.query_one("#region_select", Select).value = "all"
-            self.query_one("#language_select", Select).value = "all"
-            self.query_one("#version_select", Select).value = "all"
-            self.query_one("#size_select", Select).value = "all"
-            self.do_search()
+            self.search_input.value = ""
+            self.limit_input.value = "100"
+            for select in self.selects.values():
+                select.value = "all"
+            self.schedule_search()
 
 
 
@@ -217,7 +382,7 @@ class MyrientTUI(App):
         if column_key is None:
             return
         self.action_sort_results(column_key.lower())
-        status_label = self.query_one("#status_label", Label)
+        status_label = self.status_label
         status_label.update(
             f"Sorting by {column_key} {'↓' if self.sort_reverse else '↑'}",
             )
@@ -226,50 +391,84 @@ class MyrientTUI(App):
         self, event: DataTable.RowSelected,
     ) -> None:
         """Handle row selection events."""
-        table = self.query_one(DataTable)
+        table = self.results_table
         sel = event.cursor_row
         name = table.get_cell_at((sel,0))
         platform = table.get_cell_at((sel,1))
         size = table.get_cell_at((sel,5))
-        url = self.result_urls[str(sel)]
+        url = self.result_urls[sel]
 
-        status_label = self.query_one("#status_label", Label)
+        status_label = self.status_label
         status_label.update(f'Selected: "{name}" ({platform}) - {size}')
 
         if not self.is_web:
             download_link = self.query_one("#download_link", Link)
-            download_link.text = f"URL: {unquote(url)}"
+            download_link.text = f"URL: {_display_url(url)}"
             download_link.url = url
         else:
             download_link = self.query_one("#download_link", Label)
-            download_link.update(f"URL: {unquote(url)}")
+            download_link.update(f"URL: {_display_url(url)}")
 
     # Database
-    def check_if_db_exists(self) -> None:
+    def check_if_db_exists(self) -> bool:
         """Check if the database file is found and update widgets."""
         sync_label = self.query_one("#last_sync_label", Label)
 
-        if not self.db_file.exists():
+        # A single stat answers both whether the file exists and its age
+        try:
+            mtime = self.db_file.stat().st_mtime
+        except FileNotFoundError:
             self.notify("Database file not found.")
             sync_label.update("Database last sync date: N/A")
             return False
 
+        # The filter options arrive with the first search, which queries them
+        # on its worker thread instead of blocking the UI here.
         self.backend = MyrientBackend(self.db_file)
-        self.platforms = self.backend.list_platforms()
-        self.regions = self.backend.list_regions()
-        self.languages = self.backend.list_languages()
-        self.versions = self.backend.list_versions()
-        self.size_ranges = self.backend.list_size_ranges()
 
-        self.dbfile_time = date.fromtimestamp(Path.stat(self.db_file).st_mtime)  # noqa: DTZ012
+        self.dbfile_time = date.fromtimestamp(mtime)  # noqa: DTZ012
         sync_label.update(f"Database last sync date: {self.dbfile_time}")
         return True
 
 
     def db_progress_handler(self, msg: str) -> None:
-        """Handle database progress messages."""
-        status_label = self.query_one("#status_label", Label)
-        self.call_from_thread(status_label.update, msg)
+        """Handle database progress messages from the crawler thread."""
+        # The crawler reports every folder: post without waiting for the UI,
+        # and skip messages arriving faster than the label can be read
+        # Called from several crawler threads at once
+        with self._db_progress_lock:
+            now = perf_counter()
+            if now - self._db_progress_time < DB_PROGRESS_INTERVAL:
+                # Held back; _flush_db_progress shows it if nothing replaces it
+                self._db_progress_pending = msg
+                return
+            self._db_progress_time = now
+            self._db_progress_pending = None
+            self.post_message(DbProgress(msg))
+
+    def _flush_db_progress(self) -> None:
+        """Show a held back crawler status, on a timer while the db thread runs."""
+        with self._db_progress_lock:
+            pending, self._db_progress_pending = self._db_progress_pending, None
+            if pending is not None:
+                self._db_progress_time = perf_counter()
+                self.post_message(DbProgress(pending))
+        if self._db_thread is None or not self._db_thread.is_alive():
+            self._db_flush_timer.stop()
+
+    def _db_status(self, text: str) -> None:
+        """Show a status from the db thread after any held back progress."""
+        # Same message path as the progress, so the order is kept and a late
+        # progress message cannot overwrite this status
+        with self._db_progress_lock:
+            pending, self._db_progress_pending = self._db_progress_pending, None
+            if pending is not None:
+                self.post_message(DbProgress(pending))
+            self.post_message(DbProgress(text))
+
+    def on_db_progress(self, message: DbProgress) -> None:
+        """Show the crawler status posted by db_progress_handler."""
+        self.status_label.update(message.text)
 
 
     def update_db(self, *,
@@ -285,8 +484,6 @@ class MyrientTUI(App):
                 function that receives progress messages. Defaults to None.
 
         """
-        status_label = self.query_one("#status_label", Label)
-
         if not self.db_file.exists():
             self.notify("Database file not found.")
             self.dbfile_time = None
@@ -295,121 +492,110 @@ class MyrientTUI(App):
                 self.notify("Database has already been updated today.")
                 return
 
+        # Crawls write to the same database file: run one at a time
+        if self._db_thread is not None and self._db_thread.is_alive():
+            self.notify("A database update is already running.")
+            return
+
         if self.backend is None:
             self.backend = MyrientBackend(self.db_file)
 
         def threaded_update() -> None:
-            if not repair:
-                self.call_from_thread(status_label.update, "Updating database...")
+            try:
+                if not repair:
+                    self._db_status("Updating database...")
 
-                crawler.crawl_and_index(
-                    base_url=self.base_url,
-                    db_path=self.db_file,
-                    progress_callback=progress_callback,
-                    )
+                    crawler.crawl_and_index(
+                        base_url=self.base_url,
+                        db_path=self.db_file,
+                        progress_callback=progress_callback,
+                        )
 
-                self.call_from_thread(status_label.update, "Database update complete")
-            else:
-                self.call_from_thread(status_label.update, "Repairing database...")
+                    self._db_status("Database update complete")
+                else:
+                    self._db_status("Repairing database...")
 
-                crawler.rescan_database(
-                    base_url=self.base_url,
-                    db_path=self.db_file,
-                    progress_callback=progress_callback,
-                    )
+                    crawler.rescan_database(
+                        base_url=self.base_url,
+                        db_path=self.db_file,
+                        progress_callback=progress_callback,
+                        )
 
-                self.call_from_thread(status_label.update, "Database repair complete")
+                    self._db_status("Database repair complete")
+            finally:
+                # Even a failed crawl may have written rows
+                self.clear_search_cache()
 
-        threading.Thread(target=threaded_update, daemon=True).start()
+        self._db_thread = threading.Thread(
+            target=threaded_update, name="myrient-db", daemon=True)
+        self._db_thread.start()
+        # Statuses held back by the throttle are shown even if the crawler
+        # goes quiet; the timer stops itself once the thread has ended
+        self._db_flush_timer = self.set_interval(
+            DB_PROGRESS_INTERVAL, self._flush_db_progress)
 
 
     def repair_db(self) -> None:
         """Repair the database based on current crawler rules."""
         self.progress_update_delay = 10
-        def progress_update(current:int, total:int) -> None:
-            if current not in (
-                "Rescan and update complete.",
-                "Ignored platform deletion complete.",
-                ):
-                percent = round(int(current) / int(total) * 100, 2)
-                self.progress_queue.put(
-                    (0, f"Database repair in progress. "
-                     f"{current} of {total} entries processed.",
-                     current >= total, percent),
-                     )
+        def progress_update(
+                current: int | str,
+                total: int | None = None,
+                changed: int | None = None,
+                ) -> None:
+            # Counts while rows are rescanned, plain text for the other steps
+            if isinstance(current, int):
+                percent = current * 100 / total if total else 100
+                text = (f"Database repair in progress. "
+                        f"{current} of {total} entries processed, "
+                        f"{changed} changed.")
+                self.queue_progress((0, text, current >= total, percent))
+            elif current == "Rescan and update complete.":
+                text = (f"{current} {changed} of {total} entries changed, "
+                        f"{total - changed} unchanged.")
+                self.queue_progress((0, text, True, 100))
             else:
-                self.progress_queue.put((0, current, True, ""))
+                self.queue_progress((0, current, False, 100))
 
         self.update_db(repair=True, progress_callback=progress_update)
 
 
 
     # Reactive watchers
-    def watch_platforms(self, _old: list[str], new: list[str]) -> None:
-        """Update platform select options when platforms change."""
-        platform_select = self.query_one("#platform_select", Select)
-        current_selection = platform_select.value
-        platforms = (["all", *new] if new[0] != "all" else new) if new else ["all"]
-        platform_select.set_options(
-            [plat, plat] for plat in platforms
-            )
-        if current_selection != "all" and current_selection not in platforms:
-            platform_select.value = "all"
+    def _refresh_select(self, select_id: str, values: list[str]) -> None:
+        """Update a filter Select, rebuilding its options only if they changed."""
+        options = ("all", *values)
+        if options == self._select_options.get(select_id):
+            return
+        self._select_options[select_id] = options
+
+        select = self.query_one(select_id, Select)
+        current_selection = select.value
+        select.set_options((value, value) for value in options)
+        if current_selection != "all" and current_selection not in options:
+            select.value = "all"
         else:
-            platform_select.value = current_selection
+            select.value = current_selection
 
+    def watch_platforms(self, _old: list[str], new: list[str]) -> None:
+        """Update platform select options when platforms change."""
+        self._refresh_select("#platform_select", new)
 
     def watch_regions(self, _old: list[str], new: list[str]) -> None:
         """Update region select options when regions change."""
-        region_select = self.query_one("#region_select", Select)
-        current_selection = region_select.value
-        regions = (["all", *new] if new[0] != "all" else new) if new else ["all"]
-        region_select.set_options(
-            [reg, reg] for reg in regions
-            )
-        if current_selection != "all" and current_selection not in regions:
-            region_select.value = "all"
-        else:
-            region_select.value = current_selection
+        self._refresh_select("#region_select", new)
 
     def watch_languages(self, _old: list[str], new: list[str]) -> None:
         """Update language select options when languages change."""
-        languages_select = self.query_one("#language_select", Select)
-        current_selection = languages_select.value
-        languages = (["all", *new] if new[0] != "all" else new) if new else ["all"]
-        languages_select.set_options(
-            [lang, lang] for lang in languages
-            )
-        if current_selection != "all" and current_selection not in languages:
-            languages_select.value = "all"
-        else:
-            languages_select.value = current_selection
+        self._refresh_select("#language_select", new)
 
     def watch_versions(self, _old: list[str], new: list[str]) -> None:
         """Update version select options when versions change."""
-        version_select = self.query_one("#version_select", Select)
-        current_selection = version_select.value
-        versions = (["all", *new] if new[0] != "all" else new) if new else ["all"]
-        version_select.set_options(
-            [ver, ver] for ver in versions
-            )
-        if current_selection != "all" and current_selection not in versions:
-            version_select.value = "all"
-        else:
-            version_select.value = current_selection
+        self._refresh_select("#version_select", new)
 
     def watch_size_ranges(self, _old: list[str], new: list[str]) -> None:
         """Update size select options when size ranges change."""
-        sizes_select = self.query_one("#size_select", Select)
-        current_selection = sizes_select.value
-        sizes = (["all", *new] if new[0] != "all" else new) if new else ["all"]
-        sizes_select.set_options(
-            [size, size] for size in sizes
-            )
-        if current_selection != "all" and current_selection not in sizes:
-            sizes_select.value = "all"
-        else:
-            sizes_select.value = current_selection
+        self._refresh_select("#size_select", new)
 
 
 
@@ -420,134 +606,243 @@ class MyrientTUI(App):
         if self.sort_column == column:
             self.sort_reverse = not self.sort_reverse
         self.sort_column = column
+
+        # The page already holds every match for these filters: sort in memory
+        if (self._last_signature is not None
+                and self._last_signature == self._search_signature()):
+            self._sort_results_locally()
+            return
         self.do_search()
 
+    def _sort_results_locally(self) -> None:
+        """Re-sort the displayed page, computing each column's order only once."""
+        order = self._sort_orders.get(self.sort_column)
+        if order is None:
+            keys = [_sort_key(self.sort_column, r[self.sort_column])
+                    for r in self._last_results]
+            order = sorted(range(len(keys)), key=keys.__getitem__)
+            self._sort_orders[self.sort_column] = order
+        if self.sort_reverse:
+            order = order[::-1]
+        self._render_results([self._last_rows[i] for i in order])
+
 
 
     # Search functions
+    def schedule_search(self) -> None:
+        """Run do_search once requests settle, coalescing rapid repeats."""
+        if self._search_timer is not None:
+            # Restart the pending timer rather than replacing it
+            self._search_timer.reset()
+            return
+        delay = (SEARCH_DEBOUNCE_LARGE if len(self._last_results) >= LARGE_RESULT_COUNT
+                 else SEARCH_DEBOUNCE)
+        self._search_timer = self.set_timer(delay, self._run_scheduled_search)
+
+    def _run_scheduled_search(self) -> None:
+        """Timer callback for schedule_search."""
+        self._search_timer = None
+        self.do_search()
+
+    def _current_search(self) -> dict:
+        """Collect the current search filters from the widgets."""
+        selects = self.selects
+        return {
+            "platform": _select_value(selects["#platform_select"]),
+            "region": _select_value(selects["#region_select"]),
+            "language": _select_value(selects["#language_select"]),
+            "version": _select_value(selects["#version_select"]),
+            "size_range": _select_value(selects["#size_select"]),
+            "title_contains": self.search_input.value.strip(),
+            "title_regex": self.regex_checkbox.value,
+            }
+
+    def _results_limit(self) -> int:
+        """Return the requested page size, capped at MAX_PAGE_SIZE."""
+        return self._limit
+
+    def _search_signature(self) -> tuple:
+        """Identify the current filters and page size."""
+        return (tuple(self._current_search().items()), self._results_limit())
+
     def do_search(self, offset:int=0) -> None:
         """Search for items in the database matching the query."""
+        if self.backend is None:
+            self.notify("Database file not found.")
+            return
         self.current_offset = offset
-        results_table = self.query_one(DataTable)
+        self._search_token += 1
+        token = self._search_token
+        results_table = self.results_table
         results_table.clear()
         results_table.add_row("Searching...", "-", "-", "-", "-", "-", key="searching")
 
-        try:
-            result_input = self.query_one("#results_per_page_input", Input)
-            limit = min(int(result_input.value.strip()), 5000)
-            result_input.value = str(limit)
-        except ValueError:
-            limit = 100
+        limit = self._results_limit()
+        self.limit_input.value = str(limit)
 
-        def search_thread() -> None:
+        # Snapshot everything the worker needs here: widgets and reactives
+        # must only be touched from the main thread.
+        search = self._current_search()
+        sort_by = self.sort_column
+        sort_order = "DESC" if self.sort_reverse else "ASC"
+        current_options = (self.platforms, self.regions, self.languages,
+                           self.versions, self.size_ranges)
+
+        def run_search() -> None:
             """Send the search query to the database backend."""
+            key = (tuple(search.items()), offset, limit, sort_by, sort_order)
             try:
-                # Normalize Select values (Textual may return a NoSelection object)
-                def _get_select_value(sel_id: str) -> str | None:
-                    val = self.query_one(sel_id, Select).value
-                    if not isinstance(val, str):
-                        return None
-                    return None if val == "all" else val
-
-                platform = _get_select_value("#platform_select")
-                region = _get_select_value("#region_select")
-                language = _get_select_value("#language_select")
-                version = _get_select_value("#version_select")
-                title_contains = self.query_one("#search_input", Input).value.strip()
-                title_regex = self.query_one("#regex_checkbox", Checkbox).value
-                size_range = _get_select_value("#size_select")
-
-                search = {
-                    "platform": platform,
-                    "region": region,
-                    "language": language,
-                    "version": version,
-                    "size_range": size_range,
-                    "title_contains": title_contains,
-                    "title_regex": title_regex,
-                    }
-
                 results, platforms, regions, languages, versions, size_ranges = (
-                    self.backend.advanced_search(
+                    self._cached_search(
+                        key,
                         search=search,
-                        offset=self.current_offset,
+                        offset=offset,
                         limit=limit,
-                        sort_by=self.sort_column,
-                        sort_order="DESC" if self.sort_reverse else "ASC",
+                        sort_by=sort_by,
+                        sort_order=sort_order,
                     )
                 )
-                # update filter options based on search results
-                self.platforms = ["all", *platforms]
-                self.regions = ["all", *regions]
-                self.languages = ["all", *languages]
-                self.versions = ["all", *versions]
-                self.size_ranges = ["all", *size_ranges]
-            except TextualError as e:
-                self.call_from_thread(self._display_error, str(e))
+            except sqlite3.Error as e:
+                self.call_from_thread(self._display_error, token, str(e))
                 return
 
-            # send results to main thread for display
-            self.call_from_thread(self._display_results, results)
-
-        threading.Thread(target=search_thread, daemon=True).start()
+            # Only a first page that holds every match can be re-sorted locally
+            signature = None
+            if offset == 0 and len(results) < limit:
+                signature = (tuple(search.items()), limit)
+
+            # Format the cells here so the main thread only inserts them
+            # Rows come back in RESULT_COLUMNS order: six cells, then the url.
+            # SQLite only returns scalars, so a cell is "-" or the value as text.
+            rows = [
+                (tuple("-" if value is None else str(value) for value in r[:-1]), r[-1])
+                for r in results
+                ]
+
+            # Paging usually leaves the filter options as they are: only send
+            # them when they differ from what the Selects already hold
+            filter_options = (platforms, regions, languages, versions, size_ranges)
+            if filter_options == current_options:
+                filter_options = None
+
+            # send results and filter options to main thread for display
+            self.call_from_thread(
+                self._display_results,
+                token,
+                results,
+                rows,
+                signature,
+                filter_options,
+                )
 
+        def search_thread() -> None:
+            """Run the search and show any unexpected failure in the table."""
+            # Exceptions would otherwise be kept in a Future nobody reads
+            try:
+                run_search()
+            except Exception as e:
+                logger.exception("Search failed")
+                self.call_from_thread(self._display_error, token, str(e))
+
+        if self._search_future is not None:
+            self._search_future.cancel()
+        self._search_future = self._search_executor.submit(search_thread)
+
+
+    def _cached_search(self, key: tuple, **kwargs: object) -> tuple:
+        """Return advanced_search results, reusing a recent identical query."""
+        with self._search_cache_lock:
+            cached = self._search_cache.get(key)
+            if cached is not None:
+                self._search_cache.move_to_end(key)
+                return cached
+
+        generation = self._search_cache_generation
+        result = self.backend.advanced_search(**kwargs)
+
+        with self._search_cache_lock:
+            # The cache was cleared while this search ran: its rows may
+            # predate the database update, so do not keep them
+            if generation != self._search_cache_generation:
+                return result
+            self._search_cache[key] = result
+            if len(self._search_cache) > SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+        return result
+
+    def clear_search_cache(self) -> None:
+        """Forget cached search results, e.g. after the database changed."""
+        with self._search_cache_lock:
+            self._search_cache.clear()
+            self._search_cache_generation += 1
+        if self.backend is not None:
+            self.backend.clear_cache()
 
     def load_more_results(self) -> None:
         """Load more results from the database."""
-        offset = self.query_one("#results_per_page_input", Input).value.strip()
-        if not offset:
-            return
-        self.current_offset += int(offset)
+        self.current_offset += self._limit
         self.do_search(offset=self.current_offset)
 
 
-    def _display_error(self, msg: str) -> None:
+    def _display_error(self, token: int, msg: str) -> None:
         """Show an error row and remove searching placeholder (runs on main thread)."""
-        results_table = self.query_one(DataTable)
+        if token != self._search_token:
+            return
+        results_table = self.results_table
         results_table.clear()
 
         results_table.add_row(f"Error: {msg}", "", "", "", "", "", key="error")
-        logger.exception("Search failed: %s", msg)
+        logger.error("Search failed: %s", msg)
 
-    def _display_results(self, results: list) -> None:
+    def _display_results(
+            self,
+            token: int,
+            results: list,
+            rows: list[tuple[tuple[str, ...], str]],
+            signature: tuple | None = None,
+            filter_options: tuple[list[str], ...] | None = None,
+            ) -> None:
+        """Run on main thread: update filters, remember the page and show it."""
+        # A newer search has started since this one: its results win
+        if token != self._search_token:
+            return
+        self._last_results = results
+        self._last_rows = rows
+        self._last_signature = signature
+        self._sort_orders = {}
+
+        # The filter Selects and the table are redrawn together, once
+        with self.batch_update():
+            if filter_options is not None:
+                platforms, regions, languages, versions, size_ranges = filter_options
+                self.platforms = platforms
+                self.regions = regions
+                self.languages = languages
+                self.versions = versions
+                self.size_ranges = size_ranges
+            self._render_results(rows)
+
+    def _render_results(self, rows: list[tuple[tuple[str, ...], str]]) -> None:
         """Run on main thread: remove searching row and insert result rows."""
-        results_table = self.query_one(DataTable)
+        results_table = self.results_table
         results_table.clear()
 
-        def _cell(v: dict) -> str:
-            if v is None:
-                return "-"
-            if isinstance(v, (list, tuple)):
-                return ", ".join(str(x) for x in v) if v else "-"
-            return str(v)
-
+        self.result_urls = [url for _cells, url in rows]
 
-
-        # append rows with unique keys (use offset to avoid collisions)
-        for idx, r in enumerate(results):
-            values = (
-                _cell(r["title"]),
-                _cell(r["platform"]),
-                _cell(r["region"]),
-                _cell(r["language"]),
-                _cell(r["version"]),
-                _cell(r["size"]),
-            )
-            row_key = f"{idx}"
-            results_table.add_row(*values, key=row_key)
-            self.result_urls[row_key] = (
-                r.get("url") if isinstance(r, dict) else r["url"]
-                )
+        # Insert all rows in one call and one refresh instead of one per row
+        with self.batch_update():
+            results_table.add_rows([cells for cells, _url in rows])
 
 
 
     # Download functions
     def get_selected_url(self) -> str | None:
         """Return URL for the currently selected DataTable row or None."""
-        table = self.query_one(DataTable)
+        table = self.results_table
         sel = table.cursor_coordinate.row
         name = table.get_cell_at((sel,0))
-        return self.result_urls.get(str(sel)), name
+        url = self.result_urls[sel] if 0 <= sel < len(self.result_urls) else None
+        return url, name
 
 
     def start_download(self) -> None:
@@ -557,19 +852,23 @@ class MyrientTUI(App):
             self.notify("Downloads currently not supported in web")
             return
 
-        download_dir = self.download_dir or "downloads"
+        download_dir = self.download_dir
         if not self.downloader:
-            self.downloader = Downloader(output_dir=download_dir)
-
-        self.downloader.add_url(dw_url)
-        queue_size = self.downloader.download_queue.qsize()
+            self.downloader = Downloader(
+                output_dir=download_dir,
+                max_file_workers=self.max_workers,
+                adaptive=self.adaptive_workers,
+                pin_cpu=self.pin_cpu,
+                )
 
-        status_label = self.query_one("#status_label", Label)
+        status_label = self.status_label
 
-        if queue_size == 0:
+        if not dw_url:
             status_label.update("Select one or more items to download")
             return
 
+        queue_size = self.downloader.add_url(dw_url)
+
         status_label.update(f"Downloading {queue_size} items to {download_dir}")
 
         # If the downloader is already running, just add the URL.
@@ -579,29 +878,17 @@ class MyrientTUI(App):
 
         # This should only run once when the first download is initiated
         self.ensure_progress_slots(self.downloader.max_file_workers)
-        self.download_start_time = time()
+        self.download_start_time = perf_counter()
 
-        def progress_callback(idx:int, url:str, completed:int, total:int) -> None:
-            if self.downloader.cancel_flag.is_set():
-                return
-            parsed = urlparse(url)
-            name = Path(unquote(parsed.path)).name
-            pct = int(completed / total * 100) if total else 0
-            size = f"{int((total or 0)/(1024*1024))}MB"
-            text = f"{size:6} {name}"
-            self.call_from_thread(
-                self.progress_queue.put, (str(idx), text, completed >= total, pct),
-                )
+        progress_callback = self._download_progress_callback()
 
         def done_callback(completed:int, total:int) -> None:
-            duration = time() - self.download_start_time
-            self.call_from_thread(
-                self.progress_queue.put, ("done", completed, total, duration),
-            )
+            duration = perf_counter() - self.download_start_time
+            self.call_from_thread(self._on_download_done, completed, total, duration)
 
         def monitor_queue() -> None:
             """Wait for all items to be processed and then calls done_callback."""
-            self.downloader.download_queue.join()
+            self.downloader.wait_until_idle()
             if not self.downloader.cancel_flag.is_set():
                 # This callback is now managed by the TUI, not the downloader
                 done_callback(queue_size, queue_size)
@@ -614,12 +901,65 @@ class MyrientTUI(App):
 
         threading.Thread(target=monitor_queue, daemon=True).start()
 
+    def _download_progress_callback(self) -> Callable[..., None]:
+        """Return the downloader's progress callback, throttled to whole percents."""
+        # Last percent queued per file. Only the dispatcher thread calls
+        # progress_callback, so no lock is needed.
+        last_pct: dict[int, int] = {}
+
+        def progress_callback(
+                idx:int,
+                url:str,
+                completed:int,
+                total:int,
+                *,
+                failed:bool=False,
+                ) -> None:
+            if self.downloader.cancel_flag.is_set():
+                return
+            pct = int(completed / total * 100) if total else 0
+            # A failed file ends here too, so its slot is released
+            finished = failed or completed >= total
+            # Skip updates that do not move the bar by at least one percent
+            if finished:
+                last_pct.pop(idx, None)
+            elif last_pct.get(idx) == pct:
+                return
+            else:
+                last_pct[idx] = pct
+            text = _progress_text(url, total)
+            if failed:
+                text = f"Failed {text}"
+            # queue_progress does not block on the main thread, unlike
+            # call_from_thread, so the dispatcher keeps parsing output.
+            self.queue_progress((str(idx), text, finished, pct))
+
+        return progress_callback
+
     def stop_downloads(self) -> None:
         """Stop all downloads."""
         if self.downloader:
             self.downloader.cancel_all()
             self.reset_progress_slots()
 
+    async def action_quit(self) -> None:
+        """Stop running downloads before quitting, without freezing the UI."""
+        if (self.downloader and self.downloader.download_running
+                and not self.downloader.stopped.is_set()):
+            self.status_label.update("Stopping downloads...")
+            # cancel_all terminates the wget processes; the wait runs off the
+            # event loop and returns as soon as the last worker exits
+            self.downloader.cancel_all()
+            await asyncio.to_thread(self.downloader.wait_until_stopped, EXIT_TIMEOUT)
+        self.exit()
+
+    def on_unmount(self) -> None:
+        """Cancel running downloads left by exits other than action_quit."""
+        self._search_executor.shutdown(wait=False, cancel_futures=True)
+        if self.downloader and not self.downloader.stopped.is_set():
+            self.downloader.cancel_all()
+            self.downloader.wait_until_stopped(UNMOUNT_TIMEOUT)
+
 
 
     # Progress update functions
@@ -633,70 +973,111 @@ class MyrientTUI(App):
                           classes="progress_label")
             # layout one after another (you can customize)
             self.progress_container.mount(Horizontal(pbar, label))
-            self.progress_slots.append([pbar, label, False, None])
+            slot = ProgressSlot(pbar, label)
+            self.progress_slots.append(slot)
+            self._free_slots.append(slot)
 
 
     def reset_progress_slots(self) -> None:
         """Mark all slots unused and clear text."""
         for slot in self.progress_slots:
-            slot[0].update(progress=0)  # pbar
-            slot[1].update("")          # label
-            slot[2] = False             # in_use
-            slot[3] = None              # file_idx
+            slot.pbar.update(progress=0)
+            slot.label.update("")
+            slot.in_use = False
+            slot.file_idx = None
+            slot.text = ""
+            slot.percent = 0.0
+        self._slot_by_idx.clear()
+        self._free_slots = deque(self.progress_slots)
 
 
-    def get_or_assign_slot(self, file_idx: str) -> int:
+    def get_or_assign_slot(self, file_idx: str) -> ProgressSlot:
         """Return an existing slot for file_idx or assign a free one."""
-        # try find existing
-        for slot in self.progress_slots:
-            if slot[3] == file_idx:
-                return slot
-        # find free
-        for slot in self.progress_slots:
-            if not slot[2] and slot[3] is None:
-                slot[2] = True
-                slot[3] = file_idx
-                return slot
-        # fallback: ensure at least one slot exists
-        if not self.progress_slots:
-            self.ensure_progress_slots(1)
-        return self.progress_slots[0]
+        slot = self._slot_by_idx.get(file_idx)
+        if slot is not None:
+            return slot
+        if not self._free_slots:
+            # all slots busy, e.g. the downloader added workers: add a slot
+            self.ensure_progress_slots(len(self.progress_slots) + 1)
+        slot = self._free_slots.popleft()
+        slot.in_use = True
+        slot.file_idx = file_idx
+        self._slot_by_idx[file_idx] = slot
+        return slot
+
+    def release_slot(self, slot: ProgressSlot) -> None:
+        """Unbind a slot from its file and make it available again."""
+        if not slot.in_use:
+            return
+        self._slot_by_idx.pop(slot.file_idx, None)
+        slot.in_use = False
+        slot.file_idx = None
+        self._free_slots.append(slot)
 
     # --- queue poll / UI updater ----------------------------------------------
     def update_progress_from_queue(self) -> None:
         """Run on main thread: pull messages from queue and update slot widgets."""
+        # Drain everything first and keep only the latest update per file, so
+        # each slot is redrawn at most once per drain.
+        latest: dict[str, tuple] = {}
         try:
             while True:
                 msg = self.progress_queue.get_nowait()
                 if not msg:
                     continue
-                if msg[0] == "done":
-                    _, completed, total, duration = msg
-                    # optional: clear slots or show final message
-                    for slot in self.progress_slots:
-                        slot[0].update(progress=100)
-                    # show summary in status area (adapt to your TUI)
-                    self.query_one("#status_label", Label).update(
-                        f"Downloaded {completed}/{total} in {duration:.1f}s",
-                        )
-                    # mark slots unused
-                    for slot in self.progress_slots:
-                        slot[2] = False
-                        slot[3] = None
-                else:
-                    # expected (file_idx, text, finished:bool, percent:int)
-                    file_idx, text, finished, percent = msg
-                    slot = self.get_or_assign_slot(str(file_idx))
-                    pbar, label = slot[0], slot[1]
-                    label.update(text)
-                    pbar.update(progress=percent)
-                    if finished:
-                        # free slot when done (optionally remove widget)
-                        slot[2] = False
-                        slot[3] = None
+                # expected (file_idx, text, finished:bool, percent:int)
+                latest[str(msg[0])] = msg
         except queue.Empty:
             pass
 
+        if not latest:
+            return
+
+        # One screen refresh for all the slots changed in this drain
+        with self.batch_update():
+            for file_idx, (_, text, finished, percent) in latest.items():
+                slot = self.get_or_assign_slot(file_idx)
+                if slot.text != text:
+                    slot.label.update(text)
+                    slot.text = text
+                # Sub-half-percent moves are invisible on the bar: skip the redraw
+                if finished or abs(percent - slot.percent) >= 0.5:  # noqa: PLR2004
+                    slot.pbar.update(progress=percent)
+                    slot.percent = percent
+                if finished:
+                    # free slot when done (optionally remove widget)
+                    self.release_slot(slot)
+
+    def queue_progress(self, msg: tuple) -> None:
+        """Queue a progress message from any thread and wake the main thread."""
+        self.progress_queue.put(msg)
+        # One wakeup covers every message queued until it is handled
+        if not self._progress_wakeup.is_set():
+            self._progress_wakeup.set()
+            self.post_message(ProgressPending())
+
+    def on_progress_pending(self, _message: ProgressPending) -> None:
+        """Drain the progress queue after a worker thread queued messages."""
+        # Clear first: messages queued during the drain post a new wakeup
+        self._progress_wakeup.clear()
+        self.update_progress_from_queue()
+
+    def _on_download_done(self, completed: int, total: int, duration: float) -> None:
+        """Run on main thread: show the batch summary and free all slots."""
+        # Apply the final per-file updates still queued before resetting
+        self.update_progress_from_queue()
+        # optional: clear slots or show final message
+        for slot in self.progress_slots:
+            slot.pbar.update(progress=100)
+            slot.percent = 100
+        # show summary in status area (adapt to your TUI)
+        self.status_label.update(
+            f"Downloaded {completed}/{total} in {duration:.1f}s",
+            )
+        # mark slots unused
+        for slot in self.progress_slots:
+            self.release_slot(slot)
+
 
 
 